@@ -374,9 +374,10 @@ class Agent(ABC):
         -------
         docs : Sequence[dict]
             Documents of key metadata from the ask approach for each point in next_points.
-            Must be length of batch size.
+            Must be the same length as next_points.
         next_points : Sequence
-            Sequence of independent variables of length batch size
+            Sequence of independent variables of length batch size.
+            May be shorter if the agent runs out of points to suggest, e.g. at the end of a sequence.
         """
         ...
 
@@ -15,24 +15,45 @@ Experiment specific:
     - unpack_run
 """
 from abc import ABC
+from itertools import chain, islice
 from logging import getLogger
-from typing import Generator, Sequence, Tuple, Union
+from typing import Generator, Iterable, Optional, Sequence, Tuple, Union
 
 import numpy as np
 from numpy.typing import ArrayLike
 
 from bluesky_adaptive.agents.base import Agent
+from bluesky_adaptive.agents.utils import ObservationCacheMixin, ObservationList, _bounds_mask
 
 logger = getLogger("bluesky_adaptive.agents")
 
+# Number of skipped point indices listed in the warning for out of bounds points in a sequence
+MAX_LOGGED_SKIPS = 5
 
-class SequentialAgentBase(Agent, ABC):
+
+class _PositionBatches:
+    """Batches of points for ``ask``, sliced from an array of points known up front or drawn from a generator."""
+
+    def __init__(self, points: Union[np.ndarray, Generator]):
+        self._points = points
+        self._cursor = 0
+
+    def take(self, batch_size: int) -> list:
+        if not isinstance(self._points, np.ndarray):
+            return list(islice(self._points, batch_size))
+        batch = self._points[self._cursor : self._cursor + batch_size]
+        self._cursor += len(batch)
+        return batch.tolist() if batch.ndim == 1 else list(batch)  # Scalars as native values
+
+
+class SequentialAgentBase(ObservationCacheMixin, Agent, ABC):
     """Agent Mixin to take a pre-defined sequence and walk through it on ``ask``.
 
     Parameters
     ----------
-    sequence : Sequence[Union[float, ArrayLike]]
-        Sequence of points to be queried
+    sequence : Iterable[Union[float, ArrayLike]]
+        Sequence of points to be queried. Unsized iterables such as generators are accepted,
+        in which case the reported percent_completion is NaN.
     relative_bounds : Tuple[Union[float, ArrayLike]], optional
         Relative bounds for the members of the sequence to follow, by default None
 
@@ -42,7 +63,7 @@ class SequentialAgentBase(Agent, ABC):
         List of the independent variables at each observed point
     observable_cache : list
         List of all observables corresponding to the points in the independent_cache
-    sequence : Sequence[Union[float, ArrayLike]]
+    sequence : Iterable[Union[float, ArrayLike]]
         Sequence of points to be queried
     relative_bounds : Tuple[Union[float, ArrayLike]], optional
         Relative bounds for the members of the sequence to follow, by default None
@@ -55,62 +76,107 @@ class SequentialAgentBase(Agent, ABC):
     def __init__(
         self,
         *,
-        sequence: Sequence[Union[float, ArrayLike]],
+        sequence: Iterable[Union[float, ArrayLike]],
         relative_bounds: Tuple[Union[float, ArrayLike]] = None,
         **kwargs,
     ) -> None:
         super().__init__(**kwargs)
-        self.independent_cache = []
-        self.observable_cache = []
+        self._observations = ObservationList()
         self.sequence = sequence
+        self._seq_len = len(sequence) if hasattr(sequence, "__len__") else None
         self.relative_bounds = relative_bounds
+        if relative_bounds:
+            self._lo, self._hi = (
+                np.require(bound, dtype=np.float64, requirements="C") for bound in relative_bounds
+            )
+        else:
+            self._lo = self._hi = None
         self.ask_count = 0
-        self._position_generator = self._create_position_generator()
+        self._exhausted = False
+        seq_array, valid_mask = self._compute_bounds_mask()
+        if valid_mask is None:
+            self._positions = _PositionBatches(self._create_position_generator())
+        elif seq_array.ndim == 1 and not isinstance(sequence, np.ndarray):
+            # An object array keeps the original scalars, so e.g. ints are not proposed as floats
+            self._positions = _PositionBatches(np.asarray(sequence, dtype=object)[valid_mask])
+        else:  # In bounds points are known up front, so asks slice them directly
+            self._positions = _PositionBatches(seq_array[valid_mask])
+
+    def _compute_bounds_mask(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Check the whole sequence against the bounds in one vectorized pass.
+
+        Only applies to sized sequences that form a uniform numeric array. Otherwise, (None, None) is
+        returned and the points are checked one at a time as they are generated.
+
+        Returns
+        -------
+        seq_array : Optional[np.ndarray]
+            Sequence as an array with points along the first axis
+        valid_mask : Optional[np.ndarray]
+            Boolean mask of the points in seq_array that are within bounds
+        """
+        if not self.relative_bounds or self._seq_len is None:
+            return None, None
+        try:
+            seq_array = np.asarray(self.sequence)
+        except ValueError:  # Ragged sequence
+            return None, None
+        if seq_array.ndim == 0 or not np.issubdtype(seq_array.dtype, np.number):
+            return None, None
+        point_size = int(np.prod(seq_array.shape[1:]))
+        # Bounds stay float64, as in _create_position_generator, so both paths skip the same points
+        try:
+            lo, hi = (
+                np.ascontiguousarray(np.broadcast_to(bound, seq_array.shape[1:]).reshape(point_size))
+                for bound in (self._lo, self._hi)
+            )
+        except ValueError:  # Bounds do not match the shape of a point, let numpy broadcast per point
+            return None, None
+        points = np.ascontiguousarray(seq_array.reshape(len(seq_array), point_size))
+        valid_mask = _bounds_mask(points, lo, hi)
+        skipped = np.flatnonzero(~valid_mask)
+        if len(skipped):  # One warning for the whole sequence, rather than formatting every skipped point
+            shown = ", ".join(str(idx) for idx in skipped[:MAX_LOGGED_SKIPS])
+            logger.warning(
+                f"Points will be skipped.  {len(skipped)} points in sequence for {self.instance_name}, "
+                f"at indices {shown}{', ...' if len(skipped) > MAX_LOGGED_SKIPS else ''}, "
+                f"are out of bounds {self.relative_bounds}"
+            )
+        return seq_array, valid_mask
 
     def _create_position_generator(self) -> Generator:
-        """Yield points from sequence if within bounds"""
-        for point in self.sequence:
-            if self.relative_bounds:
-                arr = np.array(point)
-                condition = arr <= self.relative_bounds[1] or arr >= self.relative_bounds[0]
-                try:
-                    if condition:
-                        yield point
-                        continue
-                    else:
-                        logger.warning(
-                            f"Next point will be skipped.  {point} in sequence for {self.instance_name}, "
-                            f"is out of bounds {self.relative_bounds}"
-                        )
-                except ValueError:  # Array not float
-                    if condition.all():
-                        yield arr
-                        continue
-                    else:
-                        logger.warning(
-                            f"Next point will be skipped.  {point} in sequence for {self.instance_name}, "
-                            f"is out of bounds {self.relative_bounds}"
-                        )
+        """Yield points from sequence if within bounds, checking one point at a time"""
+        if not self.relative_bounds:
+            yield from self.sequence
+            return
+        points = iter(self.sequence)
+        try:
+            first = next(points)
+        except StopIteration:
+            return
+        # Sequences are homogeneous, so scalar vs. array points are dispatched once from the first point
+        scalar_points = np.ndim(first) == 0
+        for point in chain([first], points):
+            arr = point if scalar_points else np.asarray(point)
+            if np.all((arr >= self._lo) & (arr <= self._hi)):
+                yield arr
             else:
-                yield point
-
-    def tell(self, x, y) -> dict:
-        self.independent_cache.append(x)
-        self.observable_cache.append(y)
-        return dict(independent_variable=x, observable=y, cache_len=len(self.independent_cache))
+                logger.warning(
+                    f"Next point will be skipped.  {point} in sequence for {self.instance_name}, "
+                    f"is out of bounds {self.relative_bounds}"
+                )
 
     def ask(self, batch_size: int = 1) -> Tuple[Sequence[dict[str, ArrayLike]], Sequence[ArrayLike]]:
-        docs = []
-        proposals = []
-        for _ in range(batch_size):
-            self.ask_count += 1
-            try:
-                proposals.append(next(self._position_generator))
-            except StopIteration:
-                logger.warning("StopIteration met. Stopping sequential agent thread.")
-                self.stop()
-            docs.append(dict(proposal=proposals[-1], ask_count=self.ask_count))
+        proposals = self._positions.take(batch_size)
+        if len(proposals) < batch_size and not self._exhausted:  # Later asks return empty batches
+            logger.warning("StopIteration met. Stopping sequential agent thread.")
+            self._exhausted = True
+            self.stop()
+        docs = [
+            dict(proposal=proposal, ask_count=self.ask_count + i) for i, proposal in enumerate(proposals, start=1)
+        ]
+        self.ask_count += len(proposals)
         return docs, proposals
 
     def report(self, **kwargs) -> dict:
-        return dict(percent_completion=self.ask_count / len(self.sequence))
+        return dict(percent_completion=self.ask_count / self._seq_len if self._seq_len else float("nan"))
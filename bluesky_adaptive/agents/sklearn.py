@@ -14,24 +14,50 @@ Experiment specific:
     - measurement_plan_args
     - measurement_plan_kwargs
     - unpack_run
+
+Reports include ``latest_data``, the uid of the most recent run the agent was told about (the last entry of
+``Agent.tell_cache``). ``remodel_from_report`` uses it to find the tells a report was built from.
 """
 
 import importlib
 from abc import ABC
+from contextlib import nullcontext
 from logging import getLogger
-from typing import Tuple
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 
 import numpy as np
-import sklearn
 from databroker.client import BlueskyRun
 
 from bluesky_adaptive.agents.base import Agent
+from bluesky_adaptive.agents.utils import ObservationBuffer, ObservationCacheMixin
+
+if TYPE_CHECKING:  # sklearn is slow to import, so it is only imported where estimators are built or inspected
+    import sklearn
 
 logger = getLogger("bluesky_adaptive.agents")
 
+# Below this many cached observations, spinning up a thread pool costs more than it saves
+PARALLEL_MIN_CACHE_LEN = 3000
+
+# Reported for decompositions that do not expose components_, keeping the report an array
+_EMPTY_COMPONENTS = np.empty((0, 0))
+
 
-class SklearnEstimatorAgentBase(Agent, ABC):
-    def __init__(self, *, estimator: sklearn.base.BaseEstimator, **kwargs):
+def _sort_order(independents: np.ndarray) -> Union[np.ndarray, slice]:
+    """Indices that order observations by their independent variables.
+
+    Sequential acquisition usually tells data in order already, in which case the sort is skipped and an
+    identity slice is returned.
+    """
+    if independents.ndim > 1:  # Lexicographic order of vector valued independents
+        return np.lexsort(independents.reshape(len(independents), -1).T[::-1])
+    if np.all(independents[1:] >= independents[:-1]):
+        return slice(None)
+    return np.argsort(independents, kind="stable")
+
+
+class SklearnEstimatorAgentBase(ObservationCacheMixin, Agent, ABC):
+    def __init__(self, *, estimator: "sklearn.base.BaseEstimator", n_jobs: Optional[int] = None, **kwargs):
         """Basic functionality for sklearn estimators. Maintains independent and dependent caches.
         Strictly passive agent with do ask mechanism: will raise NotImplementedError
 
@@ -41,22 +67,72 @@ class SklearnEstimatorAgentBase(Agent, ABC):
             Estimator instance that inherits from TransformerMixin and BaseEstimator
             This model will be used to call fit transform.
             Common examples include PCA and NMF.
+            Estimators that implement ``partial_fit`` (e.g. IncrementalPCA, MiniBatchNMF, MiniBatchKMeans)
+            are updated incrementally with only the data told since the previous report.
+        n_jobs : Optional[int], optional
+            Number of threads used when fitting the model, -1 for all cores, by default None.
+            None leaves the estimator and joblib defaults untouched. Otherwise, it is set on estimators that
+            expose an ``n_jobs`` parameter, and fitting caches of at least ``PARALLEL_MIN_CACHE_LEN``
+            observations runs under a threading joblib backend.
         """
         super().__init__(**kwargs)
-        self.independent_cache = []
-        self.observable_cache = []
+        self._observations = ObservationBuffer()
         self.model = estimator
-
-    def tell(self, x, y):
-        self.independent_cache.append(x)
-        self.observable_cache.append(y)
-        return dict(independent_variable=x, observable=y, cache_len=len(self.independent_cache))
+        self.n_jobs = n_jobs
+        if n_jobs is not None and "n_jobs" in estimator.get_params():
+            self.model.set_params(n_jobs=n_jobs)
+        self._supports_incremental = hasattr(estimator, "partial_fit")
+        self._fit_cursor = 0
 
     def ask(self, batch_size):
         raise NotImplementedError
 
+    def _sorted_observables(self) -> np.ndarray:
+        """Stack the observable cache into an array, ordered by the independent variables."""
+        return self.observable_cache[_sort_order(self.independent_cache)]
+
+    @staticmethod
+    def _read_tell_stream(run: BlueskyRun, latest_uid: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Read the tell stream of an agent run up to and including ``latest_uid``.
+
+        Returns
+        -------
+        independents : np.ndarray
+        observables : np.ndarray
+            Contiguous matrix of observables, with rows ordered by the independent variables
+        """
+        data = run.tell["data"]
+        independents = np.asarray(data["independent_variable"])
+        observables = np.asarray(data["observable"])
+        matches = np.flatnonzero(np.asarray(data["exp_uid"]) == np.asarray(latest_uid))
+        stop = matches[0] + 1 if len(matches) else len(independents)
+        order = _sort_order(independents[:stop])
+        return independents[:stop][order], np.ascontiguousarray(observables[:stop][order])
+
+    def _fit_model(self) -> None:
+        """Fit the model to the cache.
+
+        The first fit, and every fit of an estimator without ``partial_fit``, uses the full sorted cache.
+        Afterwards, incremental estimators are only passed the observations told since the previous fit.
+        """
+        n = len(self._observations)
+        if self.n_jobs is not None and n >= PARALLEL_MIN_CACHE_LEN:
+            from joblib import parallel_backend
+
+            context = parallel_backend("threading", n_jobs=self.n_jobs)
+        else:
+            context = nullcontext()
+        with context:
+            if self._supports_incremental and self._fit_cursor:
+                if n > self._fit_cursor:
+                    self.model.partial_fit(self.observable_cache[self._fit_cursor : n])
+            else:
+                self.model.fit(self._sorted_observables())
+        self._fit_cursor = n
+
     def update_model_params(self, params: dict):
         self.model.set_params(**params)
+        self._fit_cursor = 0  # Stale incremental state is discarded by a full fit on the next report
         self.close_and_restart()
 
     def server_registrations(self) -> None:
@@ -65,7 +141,7 @@ class SklearnEstimatorAgentBase(Agent, ABC):
 
 
 class DecompositionAgentBase(SklearnEstimatorAgentBase, ABC):
-    def __init__(self, *, estimator: sklearn.base.TransformerMixin, **kwargs):
+    def __init__(self, *, estimator: "sklearn.base.TransformerMixin", **kwargs):
         """Passive, report only agent that provide dataset analysis for decomposition.
 
         Parameters
@@ -76,26 +152,34 @@ class DecompositionAgentBase(SklearnEstimatorAgentBase, ABC):
             Common examples include PCA and NMF.
         """
         super().__init__(estimator=estimator, **kwargs)
+        self._components = None
+        self._components_key = None
 
     def start(self, *args, **kwargs):
         _md = dict(model_type=str(self.model).split("(")[0], model_params=self.model.get_params())
         self.metadata.update(_md)
         super().start(*args, **kwargs)
 
+    def update_model_params(self, params: dict):
+        self._components_key = None
+        super().update_model_params(params)
+
     def report(self, **kwargs):
-        self.model.fit(np.array([x for _, x in sorted(zip(self.independent_cache, self.observable_cache))]))
-        try:
-            components = self.model.components_
-        except AttributeError:
-            components = []
+        """Fit the model and report its components. See the module docstring for ``latest_data``."""
+        # Only refit when new data has been told. update_model_params clears the key to force a refit.
+        key = len(self._observations)
+        if key != self._components_key:
+            self._fit_model()
+            self._components = getattr(self.model, "components_", _EMPTY_COMPONENTS)
+            self._components_key = key
         return dict(
-            components=components,
-            cache_len=len(self.independent_cache),
+            components=self._components,
+            cache_len=len(self._observations),
             latest_data=self.tell_cache[-1],
         )
 
     @staticmethod
-    def remodel_from_report(run: BlueskyRun, idx: int = None) -> Tuple[sklearn.base.TransformerMixin, dict]:
+    def remodel_from_report(run: BlueskyRun, idx: int = None) -> Tuple["sklearn.base.TransformerMixin", dict]:
         """Grabs specified (or most recent) report document and rebuilds modelling of dataset at that point.
 
         This enables fixed dimension reports that can be stacked and compared, while also allowing for
@@ -119,16 +203,7 @@ class DecompositionAgentBase(SklearnEstimatorAgentBase, ABC):
         idx = -1 if idx is None else idx
         model.components_ = run.report["data"]["components"][idx]
         latest_uid = run.report["data"]["latest_data"][idx]
-        independents, observables = [], []
-        for ind, obs, uid in zip(
-            run.tell["data"]["independent_variable"], run.tell["data"]["observable"], run.tell["data"]["exp_uid"]
-        ):
-            independents.append(ind)
-            observables.append(obs)
-            if uid == latest_uid:
-                break
-        independents, observables = zip(*sorted(zip(independents, observables)))
-        arr = np.array(observables)
+        independents, arr = SklearnEstimatorAgentBase._read_tell_stream(run, latest_uid)
         try:
             weights = model.transform(arr)
         except AttributeError:
@@ -136,12 +211,12 @@ class DecompositionAgentBase(SklearnEstimatorAgentBase, ABC):
             model.components_ = run.report["data"]["components"][idx]
             weights = model.transform(arr)
         return model, dict(
-            components=model.components_, weights=weights, independent_vars=independents, observables=observables
+            components=model.components_, weights=weights, independent_vars=independents, observables=arr
         )
 
 
 class ClusterAgentBase(SklearnEstimatorAgentBase, ABC):
-    def __init__(self, *, estimator: sklearn.base.ClusterMixin, **kwargs):
+    def __init__(self, *, estimator: "sklearn.base.ClusterMixin", **kwargs):
         """Passive, report only agent that provide dataset analysis for clustering.
 
         Parameters
@@ -159,17 +234,35 @@ class ClusterAgentBase(SklearnEstimatorAgentBase, ABC):
         super().start(*args, **kwargs)
 
     def report(self, **kwargs):
-        arr = np.array([x for _, x in sorted(zip(self.independent_cache, self.observable_cache))])
-        self.model.fit(arr)
+        """Fit the model and report its cluster centers. See the module docstring for ``latest_data``."""
+        self._fit_model()
 
         return dict(
             cluster_centers=self.model.cluster_centers_,
-            cache_len=len(self.independent_cache),
+            cache_len=len(self._observations),
             latest_data=self.tell_cache[-1],
         )
 
     @staticmethod
-    def remodel_from_report(run: BlueskyRun, idx: int = None) -> Tuple[sklearn.base.TransformerMixin, dict]:
+    def _predict_and_transform(
+        model: "sklearn.base.ClusterMixin", arr: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Cluster labels and distances to the cluster centers for each observation.
+
+        For k-means estimators the label is the nearest center, so it is read off the distance matrix
+        rather than recomputed with a second pass of ``predict``.
+        """
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+
+        distances = model.transform(arr)
+        if isinstance(model, (KMeans, MiniBatchKMeans)):
+            clusters = np.argmin(distances, axis=1)
+        else:
+            clusters = model.predict(arr)
+        return clusters, distances
+
+    @staticmethod
+    def remodel_from_report(run: BlueskyRun, idx: int = None) -> Tuple["sklearn.base.TransformerMixin", dict]:
         """Grabs specified (or most recent) report document and rebuilds modelling of dataset at that point.
 
         This enables fixed dimension reports that can be stacked and compared, while also allowing for
@@ -193,28 +286,17 @@ class ClusterAgentBase(SklearnEstimatorAgentBase, ABC):
         idx = -1 if idx is None else idx
         model.cluster_centers_ = run.report["data"]["cluster_centers"][idx]
         latest_uid = run.report["data"]["latest_data"][idx]
-        independents, observables = [], []
-        for ind, obs, uid in zip(
-            run.tell["data"]["independent_variable"], run.tell["data"]["observable"], run.tell["data"]["exp_uid"]
-        ):
-            independents.append(ind)
-            observables.append(obs)
-            if uid == latest_uid:
-                break
-        independents, observables = zip(*sorted(zip(independents, observables)))
-        arr = np.array(observables)
+        independents, arr = SklearnEstimatorAgentBase._read_tell_stream(run, latest_uid)
         try:
-            clusters = model.predict(arr)
-            distances = model.transform(arr)
+            clusters, distances = ClusterAgentBase._predict_and_transform(model, arr)
         except AttributeError:
             model.fit(arr)
             model.cluster_centers_ = run.report["data"]["cluster_centers"][idx]
-            clusters = model.predict(arr)
-            distances = model.transform(arr)
+            clusters, distances = ClusterAgentBase._predict_and_transform(model, arr)
         return model, dict(
             clusters=clusters,
             distances=distances,
             cluster_centers=model.cluster_centers_,
             independent_vars=independents,
-            observables=observables,
+            observables=arr,
         )
@@ -0,0 +1,296 @@
+"""Helpers shared across agent mixins."""
+
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+class _ChunkedRows:
+    """Rows of a single shape and dtype, stored in preallocated chunks.
+
+    The first chunk doubles in capacity until it reaches ``chunk_size`` rows. After that, new chunks of
+    ``chunk_size`` rows are appended, so growing never copies the chunks that are already full.
+    """
+
+    def __init__(self, row_shape: Tuple[int, ...], dtype: np.dtype, initial_capacity: int, chunk_size: int):
+        self._chunk_size = chunk_size
+        capacity = max(min(initial_capacity, chunk_size), 1)
+        self._chunks: List[np.ndarray] = [np.empty((capacity, *row_shape), dtype=dtype)]
+        self._fill = 0  # Rows filled in the last chunk
+        self._view: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return (len(self._chunks) - 1) * self._chunk_size + self._fill
+
+    def check(self, rows: np.ndarray, label: str) -> None:
+        """Check the shape of a block of rows against the stored rows, and promote their dtype if necessary"""
+        row_shape = self._chunks[0].shape[1:]
+        if rows.shape[1:] != row_shape:
+            raise ValueError(
+                f"Shape of {label} {rows.shape[1:]} does not match the shape of previous observations {row_shape}"
+            )
+        dtype = np.result_type(self._chunks[0].dtype, rows.dtype)
+        if dtype != self._chunks[0].dtype:
+            self._chunks = [chunk.astype(dtype) for chunk in self._chunks]
+            self._view = None
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Copy a block of rows into the chunks, one slice assignment per chunk touched"""
+        start = 0
+        while start < len(rows):
+            self._make_room(len(rows) - start)
+            stop = min(len(rows), start + len(self._chunks[-1]) - self._fill)
+            self._chunks[-1][self._fill : self._fill + stop - start] = rows[start:stop]
+            self._fill += stop - start
+            start = stop
+        self._view = None
+
+    def _make_room(self, n_rows: int) -> None:
+        """Ensure the last chunk has space for at least one of the next ``n_rows`` rows"""
+        last = self._chunks[-1]
+        if self._fill < len(last):
+            return
+        if len(last) < self._chunk_size:
+            capacity = min(max(2 * len(last), self._fill + n_rows), self._chunk_size)
+            grown = np.empty((capacity, *last.shape[1:]), dtype=last.dtype)
+            grown[: self._fill] = last
+            self._chunks[-1] = grown
+        else:
+            self._chunks.append(np.empty_like(last))
+            self._fill = 0
+
+    def view(self) -> np.ndarray:
+        """Contiguous array of all rows, concatenated at most once between appends"""
+        if self._view is None:
+            if len(self._chunks) == 1:
+                self._view = self._chunks[0][: self._fill]
+            else:
+                self._view = np.concatenate([*self._chunks[:-1], self._chunks[-1][: self._fill]])
+        return self._view
+
+
+class ObservationBuffer:
+    """Contiguous storage for the independent and observable values an agent is told about.
+
+    Each observation is written as a row into preallocated chunks (one set for independents, one for
+    observables) that are filled front to back. Reads return a single contiguous array, so consumers
+    like ``fit`` get a matrix without restacking a list of arrays, and that array is reused until the
+    next observation arrives.
+
+    Parameters
+    ----------
+    initial_capacity : int, optional
+        Number of rows to allocate on the first append, by default 64
+    chunk_size : int, optional
+        Maximum number of rows per chunk, by default 4096
+    """
+
+    def __init__(self, initial_capacity: int = 64, chunk_size: int = 4096):
+        self._initial_capacity = initial_capacity
+        self._chunk_size = chunk_size
+        self._independents: Optional[_ChunkedRows] = None
+        self._observables: Optional[_ChunkedRows] = None
+
+    def __len__(self) -> int:
+        return 0 if self._independents is None else len(self._independents)
+
+    @property
+    def independents(self) -> np.ndarray:
+        """All independent variables observed, stacked along the first axis"""
+        if self._independents is None:
+            return np.empty(0)
+        return self._independents.view()
+
+    @property
+    def observables(self) -> np.ndarray:
+        """All observables corresponding to the independents, stacked along the first axis"""
+        if self._observables is None:
+            return np.empty(0)
+        return self._observables.view()
+
+    def append(self, x: ArrayLike, y: ArrayLike) -> None:
+        """Append a single observation.
+
+        Parameters
+        ----------
+        x : ArrayLike
+            Independent variable for the observation
+        y : ArrayLike
+            Observable for the observation
+
+        Raises
+        ------
+        ValueError
+            If the shape of x or y differs from the previously appended observations
+        """
+        x, y = np.asarray(x), np.asarray(y)
+        self.extend(x[np.newaxis], y[np.newaxis])
+
+    def extend(self, xs: ArrayLike, ys: ArrayLike) -> None:
+        """Append a block of observations, with observations along the first axis.
+
+        Parameters
+        ----------
+        xs : ArrayLike
+            Independent variables for the observations
+        ys : ArrayLike
+            Observables for the observations
+
+        Raises
+        ------
+        ValueError
+            If xs and ys differ in length, or their observations differ in shape from previous observations
+        """
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        if len(xs) != len(ys):
+            raise ValueError(f"Got {len(xs)} independent variables for {len(ys)} observables")
+        if len(xs) == 0:
+            return
+        if self._independents is None:
+            self._independents = _ChunkedRows(xs.shape[1:], xs.dtype, self._initial_capacity, self._chunk_size)
+            self._observables = _ChunkedRows(ys.shape[1:], ys.dtype, self._initial_capacity, self._chunk_size)
+        self._independents.check(xs, "independent variable")
+        self._observables.check(ys, "observable")
+        self._independents.extend(xs)
+        self._observables.extend(ys)
+
+
+class ObservationList:
+    """List backed storage with the same interface as ObservationBuffer.
+
+    Observations are kept as they were told, without any check on their shape, for agents that never read
+    their caches as a matrix.
+    """
+
+    def __init__(self):
+        self._independents: List[ArrayLike] = []
+        self._observables: List[ArrayLike] = []
+
+    def __len__(self) -> int:
+        return len(self._independents)
+
+    @property
+    def independents(self) -> List[ArrayLike]:
+        """All independent variables observed, in the order they were told"""
+        return self._independents
+
+    @property
+    def observables(self) -> List[ArrayLike]:
+        """All observables corresponding to the independents, in the order they were told"""
+        return self._observables
+
+    def append(self, x: ArrayLike, y: ArrayLike) -> None:
+        """Append a single observation."""
+        self._independents.append(x)
+        self._observables.append(y)
+
+    def extend(self, xs: ArrayLike, ys: ArrayLike) -> None:
+        """Append a block of observations, with observations along the first axis.
+
+        Raises
+        ------
+        ValueError
+            If xs and ys differ in length
+        """
+        xs, ys = list(xs), list(ys)
+        if len(xs) != len(ys):
+            raise ValueError(f"Got {len(xs)} independent variables for {len(ys)} observables")
+        self._independents.extend(xs)
+        self._observables.extend(ys)
+
+
+class ObservationCacheMixin:
+    """Agent mixin implementing ``tell``, ``tell_many`` and the cache properties over ``self._observations``.
+
+    Agents set ``_observations`` to an ObservationBuffer or an ObservationList in ``__init__``, and list this
+    mixin ahead of Agent so that its ``tell`` fulfills the abstract method.
+    """
+
+    _observations: Union[ObservationBuffer, ObservationList]
+
+    @property
+    def independent_cache(self) -> Union[np.ndarray, List[ArrayLike]]:
+        """Independent variables at each observed point"""
+        return self._observations.independents
+
+    @property
+    def observable_cache(self) -> Union[np.ndarray, List[ArrayLike]]:
+        """Observables corresponding to the points in the independent_cache"""
+        return self._observations.observables
+
+    def tell(self, x, y) -> Dict[str, ArrayLike]:
+        self._observations.append(x, y)
+        return dict(independent_variable=x, observable=y, cache_len=len(self._observations))
+
+    def tell_many(self, xs, ys) -> Sequence[Dict[str, ArrayLike]]:
+        """Tell the agent about a batch of observations, written to the cache as a single block.
+
+        Parameters
+        ----------
+        xs : list, array
+            Array of independent variables for observations
+        ys : list, array
+            Array of dependent variables for observations
+
+        Returns
+        -------
+        list_of_dict
+            A single document summarizing the whole batch, rather than one document per observation.
+        """
+        self._observations.extend(xs, ys)
+        return [dict(independent_variable=xs, observable=ys, cache_len=len(self._observations))]
+
+
+# Compiling the numba kernel takes about a second on first use, and once compiled it runs at about the speed of
+# the NumPy mask (0.18 s vs 0.19 s for 10M float64 elements). What it saves is the NumPy mask's two temporary
+# boolean arrays the size of the sequence, which only matters for very large sequences.
+NUMBA_MIN_POINTS_SIZE = 10_000_000
+
+
+def _bounds_mask_loop(points, lo, hi):
+    """Mask of the rows of a 2D array of points that are within [lo, hi] for every column.
+
+    Loops over the points and stops checking a point at its first out of bounds column, without allocating
+    any intermediate arrays. Meant to be compiled with numba.
+    """
+    mask = np.empty(points.shape[0], np.bool_)
+    for i in range(points.shape[0]):
+        in_bounds = True
+        for j in range(points.shape[1]):
+            if not (points[i, j] >= lo[j] and points[i, j] <= hi[j]):
+                in_bounds = False
+                break
+        mask[i] = in_bounds
+    return mask
+
+
+def _bounds_mask_numpy(points, lo, hi):
+    """Mask of the rows of a 2D array of points that are within [lo, hi] for every column.
+
+    Compares every element in whole array operations, with two temporary boolean arrays the size of points.
+    """
+    return np.logical_and(points >= lo, points <= hi).all(axis=1)
+
+
+@lru_cache(maxsize=None)
+def _bounds_mask_kernel() -> Callable:
+    """Bounds mask kernel, compiled with numba if it is installed.
+
+    Numba is imported on first use rather than with this module, as it is slow to import.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return _bounds_mask_numpy
+    return njit(_bounds_mask_loop)
+
+
+def _bounds_mask(points: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Bounds mask of a 2D array of points, computed with the kernel that suits the size of the array.
+
+    Uses the numba kernel for arrays of at least ``NUMBA_MIN_POINTS_SIZE`` elements, and the NumPy mask otherwise.
+    """
+    kernel = _bounds_mask_kernel() if points.size >= NUMBA_MIN_POINTS_SIZE else _bounds_mask_numpy
+    return kernel(points, lo, hi)
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from bluesky_adaptive.agents import utils
+from bluesky_adaptive.agents.utils import (
+    ObservationBuffer,
+    ObservationList,
+    _bounds_mask,
+    _bounds_mask_kernel,
+    _bounds_mask_numpy,
+)
+
+
+def test_observation_buffer_growth():
+    buffer = ObservationBuffer(initial_capacity=2)
+    assert len(buffer) == 0
+    assert buffer.independents.shape == (0,)
+
+    for i in range(5):
+        buffer.append(i, np.arange(3) * i)
+    assert len(buffer) == 5
+    assert buffer.independents.shape == (5,)
+    assert buffer.observables.shape == (5, 3)
+    np.testing.assert_array_equal(buffer.observables[-1], [0, 4, 8])
+
+
+def test_observation_buffer_dtype_promotion():
+    buffer = ObservationBuffer()
+    buffer.append(1, np.zeros(3, dtype=int))
+    buffer.append(0.5, np.full(3, 0.5))
+    assert buffer.independents.dtype == np.float64
+    np.testing.assert_array_equal(buffer.independents, [1.0, 0.5])
+    np.testing.assert_array_equal(buffer.observables[-1], [0.5, 0.5, 0.5])
+
+
+def test_observation_buffer_shape_mismatch():
+    buffer = ObservationBuffer()
+    buffer.append(0.0, np.zeros(3))
+    with pytest.raises(ValueError):
+        buffer.append(1.0, np.zeros(4))
+    assert len(buffer) == 1
+
+
+def test_observation_buffer_chunks():
+    buffer = ObservationBuffer(initial_capacity=2, chunk_size=4)
+    for i in range(10):
+        buffer.append(float(i), np.full(2, i))
+    assert len(buffer) == 10
+    np.testing.assert_array_equal(buffer.independents, np.arange(10.0))
+    np.testing.assert_array_equal(buffer.observables[:, 0], np.arange(10))
+    assert buffer.observables.flags["C_CONTIGUOUS"]
+    assert buffer.observables is buffer.observables  # Reused until the next append
+
+
+def test_observation_buffer_extend():
+    buffer = ObservationBuffer(initial_capacity=2, chunk_size=4)
+    buffer.append(0.0, np.zeros(2))
+    buffer.extend(np.arange(1.0, 10.0), np.ones((9, 2)))
+    assert len(buffer) == 10
+    np.testing.assert_array_equal(buffer.independents, np.arange(10.0))
+    np.testing.assert_array_equal(buffer.observables.sum(axis=1), [0] + [2] * 9)
+    with pytest.raises(ValueError):
+        buffer.extend(np.arange(3.0), np.ones((2, 2)))
+
+
+def test_observation_list_any_shape():
+    observations = ObservationList()
+    observations.append(0.0, np.zeros(3))
+    observations.append(1.0, np.zeros(5))
+    observations.extend([2.0, 3.0], [np.zeros(1), np.zeros(2)])
+    assert len(observations) == 4
+    assert observations.independents == [0.0, 1.0, 2.0, 3.0]
+    assert [len(y) for y in observations.observables] == [3, 5, 1, 2]
+    with pytest.raises(ValueError):
+        observations.extend([4.0], [])
+
+
+def test_bounds_mask_kernel_matches_numpy():
+    kernel = _bounds_mask_kernel()
+    points = np.random.default_rng(0).random((50, 3))
+    points[3, 0] = points[7, 2] = np.nan  # NaN compares false, so the point is out of bounds
+    lo, hi = np.full(3, 0.2), np.full(3, 0.8)
+    mask = kernel(points, lo, hi)
+    np.testing.assert_array_equal(mask, _bounds_mask_numpy(points, lo, hi))
+    assert not mask[3] and not mask[7]
+
+    points = np.arange(-3, 9).reshape(6, 2)
+    lo, hi = np.array([-0.5, 0.5]), np.array([4.5, 7.5])
+    np.testing.assert_array_equal(kernel(points, lo, hi), _bounds_mask_numpy(points, lo, hi))
+
+
+def test_bounds_mask_numba_threshold(monkeypatch):
+    calls = []
+
+    def spy_kernel(points, lo, hi):
+        calls.append(points.size)
+        return _bounds_mask_numpy(points, lo, hi)
+
+    monkeypatch.setattr(utils, "_bounds_mask_kernel", lambda: spy_kernel)
+    points, lo, hi = np.ones((4, 2)), np.zeros(2), np.full(2, 2.0)
+    monkeypatch.setattr(utils, "NUMBA_MIN_POINTS_SIZE", points.size + 1)
+    assert _bounds_mask(points, lo, hi).all()
+    assert calls == []
+    monkeypatch.setattr(utils, "NUMBA_MIN_POINTS_SIZE", points.size)
+    assert _bounds_mask(points, lo, hi).all()
+    assert calls == [points.size]
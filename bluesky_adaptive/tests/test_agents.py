@@ -284,6 +284,122 @@ def test_sequential_agent_array(
         assert points[1][1] == 6
 
 
+def test_sequential_agent_bounds(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestSequentialAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            sequence=[1, 7, 2.5, -1, 3],
+            relative_bounds=(0, 5),
+        )
+        agent.start()
+
+        _, points = agent.ask(3)
+        assert points == [1, 2.5, 3]
+        assert [type(point) for point in points] == [int, float, int]  # The original elements of the sequence
+        agent.stop()
+
+
+def test_sequential_agent_array_bounds(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    import numpy as np
+
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestSequentialAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            sequence=np.array([[1, 4], [2, 9], [3, 5]]),
+            relative_bounds=([0, 0], [5, 5]),
+        )
+        agent.start()
+
+        _, points = agent.ask(2)
+        assert len(points) == 2
+        np.testing.assert_array_equal(points, [[1, 4], [3, 5]])
+        agent.stop()
+
+
+def test_sequential_agent_generator_bounds(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    from itertools import product
+
+    import numpy as np
+
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestSequentialAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            sequence=product([1, 2, 3], [4, 5, 6]),
+            relative_bounds=([0, 4], [5, 5]),
+        )
+        agent.start()
+
+        _, points = agent.ask(3)
+        assert len(points) == 3
+        assert [tuple(point) for point in points] == [(1, 4), (1, 5), (2, 4)]
+        assert np.isnan(agent.report()["percent_completion"])  # Length of a generator is unknown
+        agent.stop()
+
+
+def test_sequential_agent_exhausted(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestSequentialAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            sequence=[1, 2, 3],
+        )
+        agent.start()
+
+        docs, points = agent.ask(2)
+        assert points == [1, 2]
+        assert [doc["ask_count"] for doc in docs] == [1, 2]
+        docs, points = agent.ask(2)  # Sequence runs out mid batch
+        assert points == [3]
+        assert [doc["ask_count"] for doc in docs] == [3]
+        docs, points = agent.ask(2)
+        assert len(docs) == len(points) == 0
+        assert agent.ask_count == 3
+        assert agent.report()["percent_completion"] == 1.0
+
+
+def test_sequential_agent_tell_many(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestSequentialAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            sequence=[1, 2, 3],
+        )
+        agent.tell(0, [0.0])
+        docs = agent.tell_many([1, 2, 3], [[1.0], [2.0, 2.0], [3.0]])  # Observables need not share a shape
+        assert len(docs) == 1
+        assert docs[0]["independent_variable"] == [1, 2, 3]
+        assert docs[0]["cache_len"] == 4
+        assert agent.independent_cache == [0, 1, 2, 3]
+
+
 def test_close_and_restart(temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile):
     "Starts agent, restarts it, closes it. Tests for 2 bluesky runs with same agent name."
 
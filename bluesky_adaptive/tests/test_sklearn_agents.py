@@ -1,6 +1,8 @@
 import time as ttime
 from typing import Tuple, Union
+from unittest.mock import patch
 
+import joblib
 import numpy as np
 import pytest
 from bluesky import RunEngine
@@ -10,9 +12,10 @@ from bluesky_queueserver_api.http import REManagerAPI
 from databroker.client import BlueskyRun
 from numpy.typing import ArrayLike
 from sklearn.cluster import KMeans
-from sklearn.decomposition import NMF, PCA
+from sklearn.decomposition import NMF, PCA, IncrementalPCA, SparsePCA
 from tiled.client import from_profile
 
+from bluesky_adaptive.agents import sklearn as sklearn_agents
 from bluesky_adaptive.agents.base import AgentConsumer
 from bluesky_adaptive.agents.sklearn import ClusterAgentBase, DecompositionAgentBase
 
@@ -68,6 +71,17 @@ class TestClusterAgent(DummyAgentMixin, ClusterAgentBase):
     ...
 
 
+def test_sort_order():
+    assert sklearn_agents._sort_order(np.arange(5.0)) == slice(None)  # Already sorted, no sort needed
+    independents = np.array([3.0, 1.0, 2.0, 1.0])
+    np.testing.assert_array_equal(
+        sklearn_agents._sort_order(independents), np.argsort(independents, kind="stable")
+    )
+    independents = np.array([[1, 2], [0, 5], [1, 0], [0, 1]])
+    ordered = independents[sklearn_agents._sort_order(independents)]
+    assert [tuple(row) for row in ordered] == [(0, 1), (0, 5), (1, 0), (1, 2)]
+
+
 @pytest.mark.parametrize("estimator", [PCA(2), NMF(2)], ids=["PCA", "NMF"])
 def test_decomp_agent(
     estimator, temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile, tiled_node
@@ -110,6 +124,130 @@ def test_decomp_agent(
         agent.stop()
 
 
+def test_decomp_agent_tell_many(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestDecompAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            estimator=PCA(2),
+        )
+        agent.tell(0.0, np.random.rand(10))
+        docs = agent.tell_many(np.arange(1.0, 5.0), np.random.rand(4, 10))
+        assert len(docs) == 1  # One summary doc for the whole batch
+        assert docs[0]["cache_len"] == 5
+        assert docs[0]["observable"].shape == (4, 10)
+        assert agent.observable_cache.shape == (5, 10)
+        np.testing.assert_array_equal(agent.independent_cache, np.arange(5.0))
+
+
+def test_decomp_agent_incremental(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    """Tests that estimators with partial_fit are only passed the data told since the previous report."""
+    estimator = IncrementalPCA(2)
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestDecompAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            estimator=estimator,
+        )
+        agent.start()
+        with patch.object(estimator, "fit", wraps=estimator.fit) as fit, patch.object(
+            estimator, "partial_fit", wraps=estimator.partial_fit
+        ) as partial_fit:
+            for i in range(5):
+                agent.tell(float(i), np.random.rand(10))
+                agent.tell_cache.append(f"uid{i}")  # dummy uid
+            agent.report()
+            assert fit.call_count == 1  # Full fit on the first report
+            assert fit.call_args.args[0].shape == (5, 10)
+            partial_fit.reset_mock()  # IncrementalPCA.fit is built on partial_fit
+
+            for i in range(5, 8):
+                agent.tell(float(i), np.random.rand(10))
+                agent.tell_cache.append(f"uid{i}")  # dummy uid
+            agent.report()
+            assert fit.call_count == 1
+            assert partial_fit.call_count == 1  # Only the new observations
+            assert partial_fit.call_args.args[0].shape == (3, 10)
+
+            agent.update_model_params(dict(n_components=1))
+            agent.report()
+            assert fit.call_count == 2  # Full refit with the new parameters
+            assert fit.call_args.args[0].shape == (8, 10)
+        agent.stop()
+
+
+def test_decomp_agent_report_reuse(
+    temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    """Tests that reports only refit after new tells or new model parameters."""
+    estimator = PCA(2)
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        agent = TestDecompAgent(
+            pub_topic,
+            sub_topic,
+            kafka_bootstrap_servers,
+            broker_authorization_config,
+            tiled_profile,
+            estimator=estimator,
+        )
+        agent.start()
+        with patch.object(estimator, "fit", wraps=estimator.fit) as fit:
+            for i in range(5):
+                agent.tell(float(i), np.random.rand(10))
+                agent.tell_cache.append(f"uid{i}")  # dummy uid
+            components = agent.report()["components"]
+            assert agent.report()["components"] is components  # Nothing new to fit
+            assert fit.call_count == 1
+
+            agent.tell(5.0, np.random.rand(10))
+            agent.tell_cache.append("uid5")  # dummy uid
+            assert agent.report()["components"] is not components
+            assert fit.call_count == 2
+
+            agent.update_model_params(dict(n_components=1))
+            assert agent.report()["components"].shape == (1, 10)
+            assert fit.call_count == 3
+        agent.stop()
+
+
+def test_decomp_agent_n_jobs(
+    monkeypatch, temporary_topics, kafka_bootstrap_servers, broker_authorization_config, tiled_profile
+):
+    """Tests that n_jobs is only set on estimators that take it, and threads large fits."""
+    with temporary_topics(topics=["test.publisher", "test.subscriber"]) as (pub_topic, sub_topic):
+        args = (pub_topic, sub_topic, kafka_bootstrap_servers, broker_authorization_config, tiled_profile)
+        agent = TestDecompAgent(*args, estimator=SparsePCA(2), n_jobs=2)
+        assert agent.model.n_jobs == 2
+        agent = TestDecompAgent(*args, estimator=PCA(2), n_jobs=2)
+        assert "n_jobs" not in agent.model.get_params()
+        agent = TestDecompAgent(*args, estimator=SparsePCA(2, n_jobs=3))
+        assert agent.model.n_jobs == 3  # n_jobs=None leaves the estimator untouched
+
+        agent = TestDecompAgent(*args, estimator=SparsePCA(2), n_jobs=2)
+        monkeypatch.setattr(sklearn_agents, "PARALLEL_MIN_CACHE_LEN", 5)
+        with patch("joblib.parallel_backend", wraps=joblib.parallel_backend) as parallel_backend:
+            for i in range(4):
+                agent.tell(float(i), np.random.rand(10))
+                agent.tell_cache.append(f"uid{i}")  # dummy uid
+            agent.report()
+            assert parallel_backend.call_count == 0  # Below PARALLEL_MIN_CACHE_LEN
+
+            agent.tell(4.0, np.random.rand(10))
+            agent.tell_cache.append("uid4")  # dummy uid
+            agent.report()
+            parallel_backend.assert_called_once_with("threading", n_jobs=2)
+
+
 @pytest.mark.parametrize("estimator", [PCA(2), NMF(2)], ids=["PCA", "NMF"])
 def test_decomp_remodel_from_report(
     estimator,